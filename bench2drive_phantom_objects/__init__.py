@@ -1,7 +1,15 @@
 __version__ = "0.2.3"
-from .dataset_builder import DatasetBuilder, LidarConfig, build_mask
+import importlib
+
 from .download_dataset import DatasetSize, download_bech2drive_dataset
-from .lidar_recorder import LidarRecorder
+
+# carla and laspy are heavy native imports; only pull them in on first use
+_LAZY_ATTRS: dict[str, str] = {
+    "DatasetBuilder": ".dataset_builder",
+    "LidarConfig": ".dataset_builder",
+    "build_mask": ".dataset_builder",
+    "LidarRecorder": ".lidar_recorder",
+}
 
 __all__ = [
     "download_bech2drive_dataset",
@@ -11,3 +19,16 @@ __all__ = [
     "DatasetBuilder",
     "build_mask",
 ]
+
+
+def __getattr__(name: str):
+    module = _LAZY_ATTRS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
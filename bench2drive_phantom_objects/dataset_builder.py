@@ -1,5 +1,9 @@
-import glob
+import contextlib
+import os
+import queue
 import random
+import threading
+from collections.abc import Iterator
 from dataclasses import dataclass, field
 from enum import Enum
 from pathlib import Path
@@ -7,7 +11,7 @@ from typing import Optional
 
 import carla
 
-from .lidar_recorder import LidarRecorder, Perturbation
+from .lidar_recorder import LidarRecorder, Perturbation, load_annotation
 
 CLASS_BLUEPRINT_MAP: dict[str, str] = {
     "ego_vehicle": "vehicle.lincoln.mkz_2020",
@@ -61,10 +65,52 @@ def build_mask(pattern: PerturbationPattern, n: int) -> list[bool]:
             raise ValueError(f"unknown pattern: {pattern}")
 
 
+def _frame_key(anno_file: str) -> tuple[int, str]:
+    # numeric frame order, so unpadded names like 9 < 10 sort correctly
+    stem = os.path.basename(anno_file).split(".", 1)[0]
+    return (int(stem), "") if stem.isdigit() else (-1, stem)
+
+
 def _chunk(lst: list, size: int) -> list[list]:
     return [lst[i : i + size] for i in range(0, len(lst), size)]
 
 
+def _prefetch_annotations(
+    anno_files: list[str], depth: int = 4
+) -> Iterator[tuple[str, dict]]:
+    # Decode upcoming frames on a background thread while the caller ticks
+    # CARLA; gzip and the world tick both release the GIL.
+    q: queue.Queue = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+
+    def producer():
+        for anno_file in anno_files:
+            try:
+                item = (anno_file, load_annotation(anno_file), None)
+            except Exception as e:
+                item = (anno_file, None, e)
+            while not stop.is_set():
+                try:
+                    q.put(item, timeout=0.1)
+                    break
+                except queue.Full:
+                    pass
+            if stop.is_set() or item[2] is not None:
+                return
+
+    thread = threading.Thread(target=producer, daemon=True)
+    thread.start()
+    try:
+        for _ in anno_files:
+            anno_file, data, err = q.get()
+            if err is not None:
+                raise err
+            yield anno_file, data
+    finally:
+        stop.set()
+        thread.join()
+
+
 @dataclass
 class LidarConfig:
     channels: int = 64
@@ -101,13 +147,21 @@ class DatasetBuilder:
         default_factory=lambda: CLASS_BLUEPRINT_MAP.copy()
     )
     mesh_id_map: dict[str, str] = field(default_factory=lambda: MESH_ID_MAP.copy())
+    save_workers: int = 4
+    no_rendering_mode: bool = True
     verbose: bool = False
 
     def _collect_instances(self) -> list[Path]:
         base = Path(self.source_dataset_path)
         if (base / "anno").exists():
             return [base]
-        instances = [d for d in base.iterdir() if d.is_dir() and (d / "anno").exists()]
+        # is_dir() is answered from readdir's d_type (symlinks still need a
+        # stat); only the directories are then stat'ed for anno/
+        instances = [
+            Path(e.path)
+            for e in os.scandir(base)
+            if e.is_dir() and os.path.exists(os.path.join(e.path, "anno"))
+        ]
         if self.instance_filter:
             instances = [
                 d for d in instances if any(f in d.name for f in self.instance_filter)
@@ -141,12 +195,21 @@ class DatasetBuilder:
             fixed_delta_seconds=self.fixed_delta_seconds,
             output_path=self.output_path,
             verbose=self.verbose,
+            save_workers=self.save_workers,
+            no_rendering_mode=self.no_rendering_mode,
         )
 
         n = len(self.mask)
         total_scans = 0
         for instance in instances:
-            anno_files = sorted(glob.glob(str(instance / "anno" / "*.json.gz")))
+            anno_files = sorted(
+                (
+                    e.path
+                    for e in os.scandir(instance / "anno")
+                    if e.name.endswith(".json.gz") and e.is_file()
+                ),
+                key=_frame_key,
+            )
             if not anno_files:
                 continue
 
@@ -155,18 +218,19 @@ class DatasetBuilder:
                 if not recorder.initialize_scene(instance, client):
                     continue
 
-                scans_saved = 0
-                for frame_idx, anno_file in enumerate(anno_files):
-                    saved = recorder.process_frame(
-                        anno_file=anno_file,
-                        frame_idx=frame_idx,
-                        perturbation=self.perturbation
-                        if self.mask[frame_idx % n]
-                        else None,
-                    )
-                    if saved:
-                        scans_saved += 1
-
+                with contextlib.closing(_prefetch_annotations(anno_files)) as frames:
+                    for frame_idx, (anno_file, data) in enumerate(frames):
+                        recorder.process_frame(
+                            anno_file=anno_file,
+                            frame_idx=frame_idx,
+                            perturbation=self.perturbation
+                            if self.mask[frame_idx % n]
+                            else None,
+                            data=data,
+                        )
+
+                # scans encode in the background; count only completed writes
+                scans_saved = recorder.wait_for_saves()
                 print(f"{instance.name}: {scans_saved}/{len(anno_files)} scans")
                 total_scans += scans_saved
 
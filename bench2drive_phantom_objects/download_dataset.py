@@ -1,7 +1,9 @@
 import hashlib
 import json
+import multiprocessing
 import os
 import tarfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from enum import Enum
 
 import requests
@@ -14,40 +16,68 @@ class DatasetSize(Enum):
     FULL = "full"
 
 
+def _pool_context() -> multiprocessing.context.BaseContext:
+    # Process pools never fork: callers start them while other threads run
+    # (hub download monitors, CARLA RPC, annotation prefetch), and a forked
+    # child inherits whatever locks those hold. Windows has no forkserver.
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context("spawn")
+
+
+def _verify_file(dataset_dir: str, file_name: str, meta: dict) -> bool:
+    file_path = os.path.join(dataset_dir, file_name)
+    if not os.path.exists(file_path):
+        print(f"File {file_name} not found in dataset directory.")
+        return False
+    # Verify file size
+    expected_size = meta["size"]
+    actual_size = os.path.getsize(file_path)
+    if expected_size != actual_size:
+        print(
+            f"File {file_name} size mismatch: expected {expected_size}, got {actual_size}."
+        )
+        return False
+    # Verify sha256 checksum
+    with open(file_path, "rb") as f:
+        actual_sha256 = hashlib.file_digest(f, "sha256").hexdigest()
+    expected_sha256 = meta["sha256"]
+    if expected_sha256 != actual_sha256:
+        print(
+            f"File {file_name} sha256 mismatch: expected {expected_sha256}, got {actual_sha256}."
+        )
+        return False
+    return True
+
+
+def _extract_archive(file_path: str, dataset_dir: str) -> None:
+    with tarfile.open(file_path, "r:gz") as tar:
+        tar.extractall(path=dataset_dir)
+
+
 def validate_dataset(dataset_dir: str, json_file: str) -> bool:
     with open(json_file, "r") as f:
         data = json.load(f)
-    for file_name in data.keys():
-        file_path = os.path.join(dataset_dir, file_name)
-        if not os.path.exists(file_path):
-            print(f"File {file_name} not found in dataset directory.")
-            return False
-        # Verify file size
-        expected_size = data[file_name]["size"]
-        actual_size = os.path.getsize(file_path)
-        if expected_size != actual_size:
-            print(
-                f"File {file_name} size mismatch: expected {expected_size}, got {actual_size}."
-            )
-            return False
-        # Verify sha256 checksum
-        sha256_hash = hashlib.sha256()
-        with open(file_path, "rb") as f:
-            for byte_block in iter(lambda: f.read(4096), b""):
-                sha256_hash.update(byte_block)
-        actual_sha256 = sha256_hash.hexdigest()
-        expected_sha256 = data[file_name]["sha256"]
-        if expected_sha256 != actual_sha256:
-            print(
-                f"File {file_name} sha256 mismatch: expected {expected_sha256}, got {actual_sha256}."
-            )
+    if not data:
+        return True
+    # OpenSSL releases the GIL while hashing, so threads overlap fine
+    ex = ThreadPoolExecutor(max_workers=min(8, len(data)))
+    try:
+        if not all(ex.map(lambda item: _verify_file(dataset_dir, *item), data.items())):
             return False
-    # Unzip files only after validation
-    for file_name in data.keys():
-        file_path = os.path.join(dataset_dir, file_name)
-        if file_name.endswith(".tar.gz"):
-            with tarfile.open(file_path, "r:gz") as tar:
-                tar.extractall(path=dataset_dir)
+    finally:
+        ex.shutdown(wait=True, cancel_futures=True)
+    # Unzip files only after validation; gzip is single-stream, so one
+    # process per archive is the only way to use more than one core
+    archives = [
+        os.path.join(dataset_dir, file_name)
+        for file_name in data.keys()
+        if file_name.endswith(".tar.gz")
+    ]
+    if archives:
+        workers = min(os.cpu_count() or 1, len(archives))
+        with ProcessPoolExecutor(max_workers=workers, mp_context=_pool_context()) as ex:
+            list(ex.map(_extract_archive, archives, [dataset_dir] * len(archives)))
     return True
 
 
@@ -1,6 +1,12 @@
+import functools
 import gzip
 import json
+import math
+import random
+import re
+import shutil
 import threading
+from concurrent.futures import Future, ProcessPoolExecutor, wait
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Optional
@@ -9,6 +15,32 @@ import carla
 import laspy
 import numpy as np
 
+from .download_dataset import _pool_context
+
+# zlib level 1 is several times faster than gzip's default 9 on annotation
+# JSON at a near-identical ratio; output stays plain .json.gz
+ANNO_COMPRESSLEVEL = 1
+
+WEATHER_DEFAULTS: tuple[tuple[str, float], ...] = (
+    ("cloudiness", 0.0),
+    ("precipitation", 0.0),
+    ("precipitation_deposits", 0.0),
+    ("wind_intensity", 0.0),
+    ("sun_azimuth_angle", 0.0),
+    ("sun_altitude_angle", 45.0),
+    ("fog_density", 0.0),
+    ("fog_distance", 0.0),
+    ("wetness", 0.0),
+    ("fog_falloff", 0.0),
+)
+
+_ZERO_ROTATION = (0.0, 0.0, 0.0)
+
+# (annotation id, class, blueprint, transform, pose) awaiting a batch spawn
+PendingSpawn = tuple[str, str, carla.ActorBlueprint, carla.Transform, tuple]
+# (annotation id, pose) to cache once the command succeeds, or (None, None)
+BatchCommand = tuple[Optional[str], Optional[tuple], object]
+
 
 @dataclass
 class Perturbation:
@@ -19,6 +51,71 @@ class Perturbation:
     position_jitter: float = 0.0  # +- metres applied to x/y each frame
 
 
+def load_annotation(anno_file: str) -> dict:
+    # one-shot inflate of the whole file, then one json.loads over the bytes;
+    # avoids GzipFile's buffered reader and any text-decode layer
+    with open(anno_file, "rb") as f:
+        return json.loads(gzip.decompress(f.read()))
+
+
+@functools.cache
+def _las_header() -> laspy.LasHeader:
+    # Sensor-relative points fit int32 at 1 mm with a zero offset, so one
+    # header serves every frame and laspy never rescales per dimension.
+    header = laspy.LasHeader(point_format=0, version="1.2")
+    header.offsets = np.zeros(3)
+    header.scales = np.array([0.001, 0.001, 0.001])
+    return header
+
+
+@functools.cache
+def _las_point_dtype() -> np.dtype:
+    return _las_header().point_format.dtype()
+
+
+# Per-process buffers recycled across scans, grown to the largest seen.
+_worker_buffers: dict[str, np.ndarray] = {}
+
+
+def _worker_buffer(name: str, n: int, dtype: np.dtype) -> np.ndarray:
+    buf = _worker_buffers.get(name)
+    if buf is None or buf.shape[0] < n:
+        # zeroed so LAS fields that are never written stay 0
+        buf = _worker_buffers[name] = np.zeros(n, dtype=dtype)
+    return buf[:n]
+
+
+def _save_scan_worker(lidar_data: np.ndarray, path: str) -> bool:
+    # Runs in a pool process; each worker builds its header/dtype once.
+    try:
+        header = _las_header()
+        n = lidar_data.shape[0]
+
+        # Quantize straight into the packed point-format-0 record, one
+        # column at a time through a single float32 scratch array.
+        points = _worker_buffer("points", n, _las_point_dtype())
+        scratch = _worker_buffer("scratch", n, np.dtype(np.float32))
+        for col, dim in enumerate(("X", "Y", "Z")):
+            np.multiply(lidar_data[:, col], 1000.0, out=scratch)
+            points[dim] = np.rint(scratch, out=scratch)
+        # ray_cast scans are always x, y, z, intensity
+        points["intensity"] = np.multiply(lidar_data[:, 3], 65535.0, out=scratch)
+        record = laspy.PackedPointRecord(points, header.point_format)
+
+        with laspy.open(
+            path,
+            mode="w",
+            header=header,
+            do_compress=True,
+            laz_backend=laspy.LazBackend.Lazrs,
+        ) as writer:
+            writer.write_points(record)
+        return True
+    except Exception as e:
+        print(f"lidar save error {path}: {e}")
+        return False
+
+
 class LidarRecorder:
     def __init__(
         self,
@@ -28,25 +125,53 @@ class LidarRecorder:
         fixed_delta_seconds: float,
         output_path: str = "./data/recorded-lidar",
         verbose: bool = False,
+        save_workers: int = 4,
+        no_rendering_mode: bool = True,
     ):
         self.class_blueprint_map = class_blueprint_map
         self.mesh_id_map = mesh_id_map
+        # one alternation instead of a substring test per mesh key
+        self._mesh_re = (
+            re.compile("|".join(map(re.escape, mesh_id_map))) if mesh_id_map else None
+        )
         self.lidar_config = lidar_config
         self.fixed_delta_seconds = fixed_delta_seconds
         self.output_path = Path(output_path)
         self.verbose = verbose
+        self.save_workers = save_workers
+        self.no_rendering_mode = no_rendering_mode
 
         self._lidar_event = threading.Event()
 
+        # Double-buffered scan storage: the callback fills the slot that
+        # current_lidar_data does not point at, then repoints it there, so a
+        # reader never sees a half-written scan. Each slot is SoA (x, y, z, i
+        # rows) so per-axis passes are stride-1.
+        pps = float(lidar_config.get("points_per_second", 56_000))
+        hz = float(lidar_config.get("rotation_frequency", 10))
+        max_pts = int(pps * max(1.0 / hz, fixed_delta_seconds) * 1.5)
+        self._lidar_buf = np.empty((2, 4, max_pts), dtype=np.float32)
+        self._lidar_front = 0
+
+        self.client: Optional[carla.Client] = None
         self.world: Optional[carla.World] = None
         self.blueprint_library = None
+        self._bp_cache: dict[tuple[str, Optional[str]], carla.ActorBlueprint] = {}
+        self._bp_by_id: dict[str, carla.ActorBlueprint] = {}
         self.lidar_sensor: Optional[carla.Actor] = None
         self.current_lidar_data: Optional[np.ndarray] = None
-        self.lidar_data_ready: bool = False
 
         self.spawned_actors: dict[str, carla.Actor] = {}
+        # last (location, rotation) sent per actor, to skip no-op transforms
+        self._last_poses: dict[str, tuple[tuple, tuple]] = {}
         self.failed_spawn_ids: set[str] = set()
 
+        self._last_weather_key: Optional[tuple] = None
+
+        self._save_pool: Optional[ProcessPoolExecutor] = None
+        self._save_futures: list[Future] = []
+        self._save_head = 0  # futures before this index are done
+
         self._perturbation_actor: Optional[carla.Actor] = None
         self._perturbation_fixed_location: Optional[carla.Location] = None
 
@@ -55,9 +180,15 @@ class LidarRecorder:
         self.anno_new_dir: Optional[Path] = None
 
     def _lidar_callback(self, point_cloud):
-        data = np.frombuffer(point_cloud.raw_data, dtype=np.float32).reshape(-1, 4)
-        self.current_lidar_data = data
-        self.lidar_data_ready = True
+        raw = np.frombuffer(point_cloud.raw_data, dtype=np.float32).reshape(-1, 4)
+        n = raw.shape[0]
+        back = 1 - self._lidar_front
+        if n > self._lidar_buf.shape[2]:
+            self._lidar_buf = np.empty((2, 4, n), dtype=np.float32)
+        np.copyto(self._lidar_buf[back, :, :n], raw.T)
+        self._lidar_front = back
+        # (n, 4) view over the SoA slot, i.e. Fortran-ordered
+        self.current_lidar_data = self._lidar_buf[back, :, :n].T
         self._lidar_event.set()
 
     def _setup_lidar(self, ego_vehicle: carla.Actor):
@@ -65,7 +196,7 @@ class LidarRecorder:
         for k, v in self.lidar_config.items():
             bp.set_attribute(k, str(v))
         self.lidar_sensor = self.world.spawn_actor(
-            bp, carla.Transform(carla.Location(z=2)), attach_to=ego_vehicle
+            bp, carla.Transform(carla.Location(0.0, 0.0, 2.0)), attach_to=ego_vehicle
         )
         self.lidar_sensor.listen(self._lidar_callback)
 
@@ -74,88 +205,104 @@ class LidarRecorder:
         lidar_data: np.ndarray,
         frame_idx: int,
         ego_transform: Optional[carla.Transform] = None,
-    ) -> bool:
-        try:
-            pts = lidar_data[:, :3].copy()
-
-            header = laspy.LasHeader(point_format=0, version="1.2")
-            header.offsets = pts.min(axis=0)
-            header.scales = np.array([0.001, 0.001, 0.001])
-            las = laspy.LasData(header)
-            las.x, las.y, las.z = pts[:, 0], pts[:, 1], pts[:, 2]
-            if lidar_data.shape[1] > 3:
-                las.intensity = (lidar_data[:, 3] * 65535).astype(np.uint16)
-            las.write(str(self.lidar_dir / f"{frame_idx:05d}.laz"))
-            return True
-        except Exception as e:
-            print(f"lidar save error frame {frame_idx}: {e}")
-            return False
+    ):
+        # Backpressure: with more than 2 * save_workers scans in flight, block
+        # on the oldest so queued copies cannot grow without bound.
+        head = self._save_head
+        while head < len(self._save_futures) and self._save_futures[head].done():
+            head += 1
+        if len(self._save_futures) - head >= 2 * self.save_workers:
+            self._save_futures[head].exception()
+            head += 1
+        self._save_head = head
+        # Copy out of the double buffer (keeping its column-major layout);
+        # the callback reuses it next tick.
+        self._save_futures.append(
+            self._save_pool.submit(
+                _save_scan_worker,
+                lidar_data.copy(order="K"),
+                str(self.lidar_dir / f"{frame_idx:05d}.laz"),
+            )
+        )
+
+    def wait_for_saves(self) -> int:
+        # Block until every submitted scan is written; returns how many were
+        # actually saved (failed encodes/writes are not counted).
+        if not self._save_futures:
+            return 0
+        wait(self._save_futures)
+        saved = sum(
+            1 for f in self._save_futures if f.exception() is None and f.result()
+        )
+        failed = len(self._save_futures) - saved
+        if failed:
+            print(f"{failed}/{len(self._save_futures)} lidar scans failed to save")
+        self._save_futures = []
+        self._save_head = 0
+        return saved
 
     def _resolve_blueprint(self, actor_class: str, type_id: Optional[str]):
+        key = (actor_class, type_id)
+        bp = self._bp_cache.get(key)
+        if bp is None:
+            bp = self._bp_cache[key] = self._lookup_blueprint(actor_class, type_id)
+        return bp
+
+    def _lookup_blueprint(self, actor_class: str, type_id: Optional[str]):
         if type_id and type_id.startswith("/Game/"):
-            for key, val in self.mesh_id_map.items():
-                if key in type_id:
-                    return self.blueprint_library.find(val)
+            m = self._mesh_re.search(type_id) if self._mesh_re else None
+            if m:
+                return self.blueprint_library.find(self.mesh_id_map[m.group(0)])
             return self.blueprint_library.find(self.class_blueprint_map["vehicle"])
 
-        if type_id:
-            try:
-                bp = self.blueprint_library.find(type_id)
-                if bp:
-                    return bp
-            except Exception:
-                pass
+        bp = self._find_exact(type_id) if type_id else None
+        if bp is None:
+            fallback = self.class_blueprint_map.get(actor_class, "static.prop.fountain")
+            bp = self._find_exact(fallback)
+        return bp or self.blueprint_library.find("static.prop.fountain")
 
-        fallback = self.class_blueprint_map.get(actor_class, "static.prop.fountain")
-        try:
-            return self.blueprint_library.find(fallback)
-        except Exception:
-            return self.blueprint_library.find("static.prop.fountain")
+    def _find_exact(self, blueprint_id: str):
+        # exact-id membership test; unlike find() it never raises on unknown ids
+        return self._bp_by_id.get(blueprint_id)
 
     def _apply_perturbation(
         self, p: Perturbation, ego_transform: carla.Transform, frame_idx: int
     ) -> Optional[dict]:
-        import random
+        # Scalar maths via `math`; numpy ufuncs on 0-d values only add dispatch.
+        ego_loc = ego_transform.location
+        ego_yaw = ego_transform.rotation.yaw
+        ego_yaw_rad = math.radians(ego_yaw)
 
         if p.global_position_fixed and self._perturbation_fixed_location is not None:
             world_loc = self._perturbation_fixed_location
         else:
-            ego_yaw_rad = np.deg2rad(ego_transform.rotation.yaw)
-            offset_angle_rad = np.deg2rad(p.rotation_angle)
-            combined = ego_yaw_rad + offset_angle_rad
+            combined = ego_yaw_rad + math.radians(p.rotation_angle)
             world_loc = carla.Location(
-                x=ego_transform.location.x
-                + p.spawn_distance_from_ego * np.cos(combined),
-                y=ego_transform.location.y
-                + p.spawn_distance_from_ego * np.sin(combined),
-                z=ego_transform.location.z,
+                ego_loc.x + p.spawn_distance_from_ego * math.cos(combined),
+                ego_loc.y + p.spawn_distance_from_ego * math.sin(combined),
+                ego_loc.z,
             )
             if p.global_position_fixed:
                 self._perturbation_fixed_location = world_loc
 
-        jx = (
-            random.uniform(-p.position_jitter, p.position_jitter)
-            if p.position_jitter
-            else 0.0
-        )
-        jy = (
-            random.uniform(-p.position_jitter, p.position_jitter)
-            if p.position_jitter
-            else 0.0
-        )
-        world_loc = carla.Location(
-            x=world_loc.x + jx, y=world_loc.y + jy, z=world_loc.z
-        )
-        rotation = carla.Rotation(
-            yaw=float(ego_transform.rotation.yaw + p.rotation_angle)
-        )
+        if p.position_jitter:
+            jx = random.uniform(-p.position_jitter, p.position_jitter)
+            jy = random.uniform(-p.position_jitter, p.position_jitter)
+        else:
+            jx = jy = 0.0
+        world_loc = carla.Location(world_loc.x + jx, world_loc.y + jy, world_loc.z)
+        rotation = carla.Rotation(0.0, float(ego_yaw + p.rotation_angle), 0.0)
         transform = carla.Transform(world_loc, rotation)
 
         if self._perturbation_actor is None or not self._perturbation_actor.is_alive:
-            bp = self.blueprint_library.find(p.blueprint)
+            # masks like IN_AND_OUT respawn the actor; look the blueprint up once
+            bp_key = ("perturbation", p.blueprint)
+            bp = self._bp_cache.get(bp_key)
+            if bp is None:
+                bp = self._bp_cache[bp_key] = self.blueprint_library.find(p.blueprint)
             # Spawn high above the scene where nothing exists, then teleport down
             clear_transform = carla.Transform(
-                carla.Location(x=transform.location.x, y=transform.location.y, z=100.0),
+                carla.Location(transform.location.x, transform.location.y, 100.0),
                 transform.rotation,
             )
             actor = self.world.try_spawn_actor(bp, clear_transform)
@@ -170,11 +317,10 @@ class LidarRecorder:
 
         extent = self._perturbation_actor.bounding_box.extent
 
-        dx = world_loc.x - ego_transform.location.x
-        dy = world_loc.y - ego_transform.location.y
-        dz = world_loc.z - ego_transform.location.z
-        ego_yaw_rad = np.deg2rad(ego_transform.rotation.yaw)
-        cos_y, sin_y = np.cos(-ego_yaw_rad), np.sin(-ego_yaw_rad)
+        dx = world_loc.x - ego_loc.x
+        dy = world_loc.y - ego_loc.y
+        dz = world_loc.z - ego_loc.z
+        cos_y, sin_y = math.cos(-ego_yaw_rad), math.sin(-ego_yaw_rad)
         save_loc = [
             cos_y * dx - sin_y * dy,
             sin_y * dx + cos_y * dy,
@@ -183,7 +329,7 @@ class LidarRecorder:
         save_rot = [
             rotation.pitch,
             rotation.roll,
-            rotation.yaw - ego_transform.rotation.yaw,
+            rotation.yaw - ego_yaw,
         ]
 
         return {
@@ -222,6 +368,7 @@ class LidarRecorder:
 
         try:
             self.world = client.load_world(town_name)
+            self.client = client
         except RuntimeError as e:
             print(f"load_world failed: {e}")
             return False
@@ -229,16 +376,26 @@ class LidarRecorder:
         settings = self.world.get_settings()
         settings.synchronous_mode = True
         settings.fixed_delta_seconds = self.fixed_delta_seconds
+        # ray_cast LiDAR traces the physics scene, not the renderer
+        settings.no_rendering_mode = self.no_rendering_mode
         self.world.apply_settings(settings)
 
         self.blueprint_library = self.world.get_blueprint_library()
+        # one pass over the library so exact-id lookups need no filter() scan
+        self._bp_by_id = {bp.id: bp for bp in self.blueprint_library}
+        self._bp_cache = {}
+        self._last_weather_key = None
         self.spawned_actors = {}
+        self._last_poses = {}
         self.failed_spawn_ids = set()
         self.lidar_sensor = None
-        self.lidar_data_ready = False
         self._lidar_event.clear()
         self._perturbation_actor = None
         self._perturbation_fixed_location = None
+        if self._save_pool is None:
+            self._save_pool = ProcessPoolExecutor(
+                max_workers=self.save_workers, mp_context=_pool_context()
+            )
 
         output_base = self.output_path / instance_path.name
         self.lidar_dir = output_base / "lidar"
@@ -249,79 +406,168 @@ class LidarRecorder:
 
         return True
 
+    def _spawn_pending(self, pending: list[PendingSpawn]):
+        # One SpawnActor batch for the frame, then one retry batch 2 m higher
+        # for whatever collided, then a single get_actors() for the handles
+        # and one batch of physics/pose follow-ups. Called after the frame's
+        # existing actors have moved, so collision checks see this frame.
+        SpawnActor = carla.command.SpawnActor
+        spawned: list[tuple[int, PendingSpawn, bool]] = []
+
+        responses = self.client.apply_batch_sync(
+            [SpawnActor(bp, tf) for _, _, bp, tf, _ in pending], False
+        )
+        retry = []
+        for item, resp in zip(pending, responses):
+            if resp.error:
+                retry.append(item)
+            else:
+                spawned.append((resp.actor_id, item, True))
+
+        if retry:
+            lifted = [
+                SpawnActor(
+                    bp,
+                    carla.Transform(
+                        tf.location + carla.Location(0.0, 0.0, 2.0), tf.rotation
+                    ),
+                )
+                for _, _, bp, tf, _ in retry
+            ]
+            for item, resp in zip(retry, self.client.apply_batch_sync(lifted, False)):
+                if resp.error:
+                    actor_id, actor_class = item[0], item[1]
+                    self.failed_spawn_ids.add(actor_id)
+                    if self.verbose:
+                        print(f"failed to spawn {actor_class} {actor_id}: {resp.error}")
+                else:
+                    spawned.append((resp.actor_id, item, False))
+
+        if not spawned:
+            return
+        actors = {a.id: a for a in self.world.get_actors([s[0] for s in spawned])}
+        commands: list[BatchCommand] = []
+        for carla_id, (actor_id, actor_class, _, transform, pose), exact in spawned:
+            actor = actors.get(carla_id)
+            if actor is None:
+                # spawned server-side but no handle; don't leave it in the world
+                commands.append((None, None, carla.command.DestroyActor(carla_id)))
+                self.failed_spawn_ids.add(actor_id)
+                continue
+            self.spawned_actors[actor_id] = actor
+            commands.append(
+                (None, None, carla.command.SetSimulatePhysics(carla_id, False))
+            )
+            if exact:
+                self._last_poses[actor_id] = pose
+            else:
+                # lifted spawn; move it down to the annotated pose
+                commands.append(
+                    (actor_id, pose, carla.command.ApplyTransform(carla_id, transform))
+                )
+            if actor_class == "ego_vehicle" and self.lidar_sensor is None:
+                self._setup_lidar(actor)
+        self._apply_batch(commands)
+
+    def _apply_batch(self, batch: list[BatchCommand]):
+        # Send (actor_id, pose, command) entries as one synchronous batch and
+        # cache a pose only once the server has accepted its ApplyTransform,
+        # so a rejected move is retried on the next frame instead of skipped.
+        if not batch:
+            return
+        responses = self.client.apply_batch_sync([c for _, _, c in batch], False)
+        for (actor_id, pose, _), resp in zip(batch, responses):
+            if resp.error:
+                if self.verbose:
+                    print(f"batch command error: {resp.error}")
+            elif pose is not None:
+                self._last_poses[actor_id] = pose
+
     def process_frame(
         self,
         anno_file: str,
         frame_idx: int,
         perturbation: Optional[Perturbation] = None,
+        data: Optional[dict] = None,
     ) -> bool:
         if self.world is None:
             raise RuntimeError("call initialize_scene() before process_frame()")
 
-        with gzip.open(anno_file, "rt") as f:
-            data = json.load(f)
+        if data is None:
+            data = load_annotation(anno_file)
 
-        with gzip.open(self.anno_original_dir / f"{frame_idx:05d}.json.gz", "wt") as f:
-            json.dump(data, f)
+        # the source file already is the original annotation; no re-encode
+        anno_name = f"{frame_idx:05d}.json.gz"
+        shutil.copyfile(anno_file, self.anno_original_dir / anno_name)
 
-        current_ids: set[str] = set()
         ego_transform: Optional[carla.Transform] = None
-
-        for bb in data.get("bounding_boxes", []):
+        ego_id: Optional[str] = None
+        # moves of already-spawned actors go to the server as one batch
+        commands: list[BatchCommand] = []
+        # new actors are spawned together after the loop, see _spawn_pending
+        pending: list[PendingSpawn] = []
+
+        bbs = data.get("bounding_boxes", [])
+        current_ids: set[str] = {bb.get("id") for bb in bbs}
+        for bb in bbs:
             actor_class = bb.get("class")
             actor_id = bb.get("id")
-            current_ids.add(actor_id)
 
             loc = bb.get("location")
-            rot = bb.get("rotation", [0, 0, 0])
+            rot = bb.get("rotation") or _ZERO_ROTATION
+            pose = (tuple(loc), tuple(rot))
+            if (
+                actor_class != "ego_vehicle"
+                and actor_id in self.spawned_actors
+                and self._last_poses.get(actor_id) == pose
+            ):
+                # placed and unmoved: no CARLA objects to build or send
+                continue
+
+            # positional args skip pybind11 kwarg parsing; Rotation is
+            # (pitch, yaw, roll) while annotations store [pitch, roll, yaw]
             transform = carla.Transform(
-                carla.Location(x=loc[0], y=loc[1], z=loc[2]),
-                carla.Rotation(pitch=rot[0], roll=rot[1], yaw=rot[2]),
+                carla.Location(loc[0], loc[1], loc[2]),
+                carla.Rotation(rot[0], rot[2], rot[1]),
             )
 
             if actor_class == "ego_vehicle":
                 ego_transform = transform
+                ego_id = actor_id
 
-            if (
-                actor_id not in self.spawned_actors
-                and actor_id not in self.failed_spawn_ids
-            ):
+            if actor_id in self.spawned_actors:
+                if self._last_poses.get(actor_id) != pose:
+                    commands.append(
+                        (
+                            actor_id,
+                            pose,
+                            carla.command.ApplyTransform(
+                                self.spawned_actors[actor_id].id, transform
+                            ),
+                        )
+                    )
+            elif actor_id not in self.failed_spawn_ids:
                 try:
                     bp = self._resolve_blueprint(actor_class, bb.get("type_id"))
-                    actor = self.world.try_spawn_actor(
-                        bp, transform
-                    ) or self.world.try_spawn_actor(
-                        bp,
-                        carla.Transform(
-                            transform.location + carla.Location(z=2.0),
-                            transform.rotation,
-                        ),
-                    )
-                    if actor:
-                        actor.set_simulate_physics(False)
-                        self.spawned_actors[actor_id] = actor
-                        if actor_class == "ego_vehicle" and self.lidar_sensor is None:
-                            self._setup_lidar(actor)
-                    else:
-                        self.failed_spawn_ids.add(actor_id)
-                        if self.verbose:
-                            print(f"failed to spawn {actor_class} {actor_id}")
+                    pending.append((actor_id, actor_class, bp, transform, pose))
                 except Exception as e:
                     if self.verbose:
                         print(f"spawn error {actor_id}: {e}")
                     self.failed_spawn_ids.add(actor_id)
 
-            if actor_id in self.spawned_actors:
-                self.spawned_actors[actor_id].set_transform(transform)
-
-            if actor_class == "ego_vehicle" and actor_id in self.spawned_actors:
-                fwd = transform.get_forward_vector()
-                self.world.get_spectator().set_transform(
-                    carla.Transform(
-                        transform.location - fwd * 12 + carla.Location(z=6),
-                        carla.Rotation(pitch=-20, yaw=transform.rotation.yaw),
-                    )
+        self._apply_batch(commands)
+        if pending:
+            self._spawn_pending(pending)
+
+        # nothing to watch while the server isn't rendering
+        if ego_id in self.spawned_actors and not self.no_rendering_mode:
+            fwd = ego_transform.get_forward_vector()
+            self.world.get_spectator().set_transform(
+                carla.Transform(
+                    ego_transform.location - fwd * 12 + carla.Location(0.0, 0.0, 6.0),
+                    carla.Rotation(-20.0, ego_transform.rotation.yaw, 0.0),
                 )
+            )
 
         perturbation_anno = []
         if perturbation is not None and ego_transform is not None:
@@ -331,48 +577,52 @@ class LidarRecorder:
         else:
             self._destroy_perturbation_actor()
 
-        for aid in set(self.spawned_actors) - current_ids:
-            try:
-                self.spawned_actors.pop(aid).destroy()
-            except Exception:
-                pass
+        gone = set(self.spawned_actors) - current_ids
+        if gone:
+            for aid in gone:
+                self._last_poses.pop(aid, None)
+            self.client.apply_batch(
+                [
+                    carla.command.DestroyActor(self.spawned_actors.pop(aid).id)
+                    for aid in gone
+                ]
+            )
 
+        # routes normally hold one weather for every frame; only resend on change
         w = data.get("weather", {})
-        self.world.set_weather(
-            carla.WeatherParameters(
-                cloudiness=w.get("cloudiness", 0.0),
-                precipitation=w.get("precipitation", 0.0),
-                precipitation_deposits=w.get("precipitation_deposits", 0.0),
-                wind_intensity=w.get("wind_intensity", 0.0),
-                sun_azimuth_angle=w.get("sun_azimuth_angle", 0.0),
-                sun_altitude_angle=w.get("sun_altitude_angle", 45.0),
-                fog_density=w.get("fog_density", 0.0),
-                fog_distance=w.get("fog_distance", 0.0),
-                wetness=w.get("wetness", 0.0),
-                fog_falloff=w.get("fog_falloff", 0.0),
+        weather_key = tuple(w.get(k, default) for k, default in WEATHER_DEFAULTS)
+        if weather_key != self._last_weather_key:
+            self.world.set_weather(
+                carla.WeatherParameters(
+                    **{k: v for (k, _), v in zip(WEATHER_DEFAULTS, weather_key)}
+                )
             )
-        )
+            self._last_weather_key = weather_key
 
+        self._lidar_event.clear()
         self.world.tick()
 
-        scan_saved = False
+        # True once the scan is handed to the save pool; the write itself
+        # finishes later, see wait_for_saves() for the completed count
+        scan_submitted = False
         if self.lidar_sensor is not None:
             fired = self._lidar_event.wait(timeout=self.fixed_delta_seconds * 3)
-            self._lidar_event.clear()
             if fired and self.current_lidar_data is not None:
-                scan_saved = self._save_lidar_scan(self.current_lidar_data, frame_idx)
-                self.lidar_data_ready = False
+                self._save_lidar_scan(self.current_lidar_data, frame_idx)
+                scan_submitted = True
             elif not fired:
                 print(f"lidar callback timeout frame {frame_idx}")
 
-        new_data = {
-            **data,
-            "bounding_boxes": data["bounding_boxes"] + perturbation_anno,
-        }
-        with gzip.open(self.anno_new_dir / f"{frame_idx:05d}.json.gz", "wt") as f:
-            json.dump(new_data, f)
+        # anno_original is already on disk, so extend in place rather than copy
+        data.setdefault("bounding_boxes", []).extend(perturbation_anno)
+        with gzip.open(
+            self.anno_new_dir / anno_name,
+            "wb",
+            compresslevel=ANNO_COMPRESSLEVEL,
+        ) as f:
+            f.write(json.dumps(data).encode())
 
-        return scan_saved
+        return scan_submitted
 
     def cleanup(self):
         self._destroy_perturbation_actor()
@@ -385,15 +635,27 @@ class LidarRecorder:
                 print(f"lidar cleanup error: {e}")
             self.lidar_sensor = None
 
-        for actor in self.spawned_actors.values():
+        if self._save_pool is not None:
+            self.wait_for_saves()
+            self._save_pool.shutdown(wait=True)
+            self._save_pool = None
+
+        if self.spawned_actors and self.client is not None:
             try:
-                actor.destroy()
-            except Exception:
-                pass
+                self.client.apply_batch_sync(
+                    [
+                        carla.command.DestroyActor(actor.id)
+                        for actor in self.spawned_actors.values()
+                    ]
+                )
+            except Exception as e:
+                print(f"actor cleanup error: {e}")
         self.spawned_actors = {}
+        self._last_poses = {}
 
         if self.world is not None:
             settings = self.world.get_settings()
             settings.synchronous_mode = False
+            settings.no_rendering_mode = False
             self.world.apply_settings(settings)
             self.world = None